@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 """Generate rpp_final.json with 2026 minimum wage data and tier-based basket pricing."""
 
-import json
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '数据抓取'))
+import snapshots  # noqa: E402
 
 # ── 2026 Official Hourly Wages (¥/hr) ──
 WAGES = {
@@ -72,19 +75,8 @@ def generate():
     results.sort(key=lambda x: x['real_index'], reverse=True)
     return results
 
-data = generate()
-
-# Write JSON
-out_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'data', 'rpp_final.json')
-with open(out_path, 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
-print(f'✅ Wrote {len(data)} provinces to {os.path.abspath(out_path)}')
+OUT_PATH = snapshots.DATA_DIR / 'rpp_final.json'
 
-# ── Summary table ──
-print()
-print('=' * 85)
-print(f'{"Province":<8} {"Wage":>6} {"Real":>6} {"Basket":>7} {"Off.Idx":>8} {"Real.Idx":>9} {"Tier"}')
-print('-' * 85)
 
 def get_tier(name):
     if name in TIER_1: return "Tier-1"
@@ -94,45 +86,67 @@ def get_tier(name):
     if name in CENTRAL: return "Central"
     return "Other"
 
-for d in data:
-    tier = get_tier(d["name"])
-    print(f'{d["name"]:<8} ¥{d["wage"]:>5.1f} ¥{d["real_wage"]:>5.2f} '
-          f'¥{d["basket_price"]:>6.1f} {d["index"]:>8.2f} {d["real_index"]:>9.2f} {tier}')
-
-# ── Item Breakdown Example ──
-print()
-print('═' * 85)
-print('ITEM BREAKDOWN FORMULA (Example: 辽宁 with basket_price = ¥11.9)')
-print('═' * 85)
-ln_basket = calculate_basket_price('辽宁')
-print(f'\nBasket Price: ¥{ln_basket:.1f}')
-print(f'  - Pork (500g):    {ITEM_WEIGHTS["pork_500g"]*100:.0f}% → ¥{ln_basket * ITEM_WEIGHTS["pork_500g"]:.2f}/jin')
-print(f'  - Eggs (10 units): {ITEM_WEIGHTS["eggs_10"]*100:.0f}% → ¥{ln_basket * ITEM_WEIGHTS["eggs_10"]:.2f} total')
-print(f'  - Rice (500g):    {ITEM_WEIGHTS["rice_500g"]*100:.0f}% → ¥{ln_basket * ITEM_WEIGHTS["rice_500g"]:.2f}/jin')
-print(f'  - Milk (250ml):   {ITEM_WEIGHTS["milk_250ml"]*100:.0f}% → ¥{ln_basket * ITEM_WEIGHTS["milk_250ml"]:.2f}/bag')
-
-# ── Spotlight: 辽宁 vs 上海 ──
-print()
-print('═' * 85)
-print('SPOTLIGHT: 辽宁 (Northeast) vs 上海 (Tier-1)')
-print('═' * 85)
-for target in ['辽宁', '上海']:
-    d = next(x for x in data if x['name'] == target)
-    print(f'\n  {d["name"]} ({get_tier(d["name"])}) — Real Index: {d["real_index"]:.2f}')
-    print(f'    Official Wage:  ¥{d["wage"]}/hr')
-    print(f'    Reality Wage:   ¥{d["real_wage"]}/hr  (×0.45)')
-    print(f'    Basket Price:   ¥{d["basket_price"]}')
-    
-    # Calculate "What 1 hour buys"
-    rw = d["real_wage"]
-    bp = d["basket_price"]
-    pork_price_jin = bp * 0.45
-    pork_grams = (rw / pork_price_jin) * 500
-    eggs_price_unit = (bp * 0.15) / 10
-    eggs = rw / eggs_price_unit
-    
-    print(f'    → 1 hour buys: {pork_grams:.0f}g pork, {eggs:.0f} eggs')
-    
-    monthly = rw * 10 * 26
-    print(f'    Monthly Income: ¥{monthly:.0f}  (10h × 26d)')
-    print(f'    Survival Assessment: {"✅ Manageable" if d["real_index"] >= 0.65 else "⚠ Difficult" if d["real_index"] >= 0.5 else "💀 Crushing"}')
+
+def print_report(data):
+    # ── Summary table ──
+    print()
+    print('=' * 85)
+    print(f'{"Province":<8} {"Wage":>6} {"Real":>6} {"Basket":>7} {"Off.Idx":>8} {"Real.Idx":>9} {"Tier"}')
+    print('-' * 85)
+
+    for d in data:
+        tier = get_tier(d["name"])
+        print(f'{d["name"]:<8} ¥{d["wage"]:>5.1f} ¥{d["real_wage"]:>5.2f} '
+              f'¥{d["basket_price"]:>6.1f} {d["index"]:>8.2f} {d["real_index"]:>9.2f} {tier}')
+
+    # ── Item Breakdown Example ──
+    print()
+    print('═' * 85)
+    print('ITEM BREAKDOWN FORMULA (Example: 辽宁 with basket_price = ¥11.9)')
+    print('═' * 85)
+    ln_basket = calculate_basket_price('辽宁')
+    print(f'\nBasket Price: ¥{ln_basket:.1f}')
+    print(f'  - Pork (500g):    {ITEM_WEIGHTS["pork_500g"]*100:.0f}% → ¥{ln_basket * ITEM_WEIGHTS["pork_500g"]:.2f}/jin')
+    print(f'  - Eggs (10 units): {ITEM_WEIGHTS["eggs_10"]*100:.0f}% → ¥{ln_basket * ITEM_WEIGHTS["eggs_10"]:.2f} total')
+    print(f'  - Rice (500g):    {ITEM_WEIGHTS["rice_500g"]*100:.0f}% → ¥{ln_basket * ITEM_WEIGHTS["rice_500g"]:.2f}/jin')
+    print(f'  - Milk (250ml):   {ITEM_WEIGHTS["milk_250ml"]*100:.0f}% → ¥{ln_basket * ITEM_WEIGHTS["milk_250ml"]:.2f}/bag')
+
+    # ── Spotlight: 辽宁 vs 上海 ──
+    print()
+    print('═' * 85)
+    print('SPOTLIGHT: 辽宁 (Northeast) vs 上海 (Tier-1)')
+    print('═' * 85)
+    for target in ['辽宁', '上海']:
+        d = next(x for x in data if x['name'] == target)
+        print(f'\n  {d["name"]} ({get_tier(d["name"])}) — Real Index: {d["real_index"]:.2f}')
+        print(f'    Official Wage:  ¥{d["wage"]}/hr')
+        print(f'    Reality Wage:   ¥{d["real_wage"]}/hr  (×0.45)')
+        print(f'    Basket Price:   ¥{d["basket_price"]}')
+
+        # Calculate "What 1 hour buys"
+        rw = d["real_wage"]
+        bp = d["basket_price"]
+        pork_price_jin = bp * 0.45
+        pork_grams = (rw / pork_price_jin) * 500
+        eggs_price_unit = (bp * 0.15) / 10
+        eggs = rw / eggs_price_unit
+
+        print(f'    → 1 hour buys: {pork_grams:.0f}g pork, {eggs:.0f} eggs')
+
+        monthly = rw * 10 * 26
+        print(f'    Monthly Income: ¥{monthly:.0f}  (10h × 26d)')
+        print(f'    Survival Assessment: {"✅ Manageable" if d["real_index"] >= 0.65 else "⚠ Difficult" if d["real_index"] >= 0.5 else "💀 Crushing"}')
+
+
+def main():
+    data = generate()
+
+    # Write JSON (versioned snapshot + patches)
+    snapshots.publish(data)
+    print(f'✅ Wrote {len(data)} provinces to {OUT_PATH.resolve()}')
+
+    print_report(data)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """Generate rpp_final.json — Hardcore Reality dataset."""
-import json, os
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '数据抓取'))
+import snapshots  # noqa: E402
 
 # ── Core "Truth" data ──
 CORE = {
@@ -32,16 +35,16 @@ MAP_TO = {
     '青海': '西藏',
 }
 
-# ── Build full dataset ──
-data = []
+OUT_PATH = snapshots.DATA_DIR / 'rpp_final.json'
 
-for name, d in CORE.items():
+
+def _record(name: str, d: dict) -> dict:
     ri = round(d['wage'] / d['basket'], 2)
     pork = round(d['basket'] * 0.45, 2)
     eggs = round(d['basket'] * 0.15, 2)
     rice = round(d['basket'] * 0.15, 2)
     milk = round(d['basket'] * 0.25, 2)
-    data.append({
+    return {
         'name': name,
         'official_wage': 20.0,
         'real_wage': d['wage'],
@@ -50,37 +53,32 @@ for name, d in CORE.items():
         'verdict': d['verdict'],
         'level': d['level'],
         'details': {'pork': pork, 'eggs': eggs, 'rice': rice, 'milk': milk},
-    })
+    }
 
-for name, ref in MAP_TO.items():
-    src = CORE[ref]
-    ri = round(src['wage'] / src['basket'], 2)
-    pork = round(src['basket'] * 0.45, 2)
-    eggs = round(src['basket'] * 0.15, 2)
-    rice = round(src['basket'] * 0.15, 2)
-    milk = round(src['basket'] * 0.25, 2)
-    data.append({
-        'name': name,
-        'official_wage': 20.0,
-        'real_wage': src['wage'],
-        'basket_price': src['basket'],
-        'real_index': ri,
-        'verdict': src['verdict'],
-        'level': src['level'],
-        'details': {'pork': pork, 'eggs': eggs, 'rice': rice, 'milk': milk},
-    })
 
-# Sort by real_index descending (best survival first)
-data.sort(key=lambda x: x['real_index'], reverse=True)
+# ── Build full dataset ──
+def build() -> list[dict]:
+    data = [_record(name, d) for name, d in CORE.items()]
+    data += [_record(name, CORE[ref]) for name, ref in MAP_TO.items()]
+
+    # Sort by real_index descending (best survival first)
+    data.sort(key=lambda x: x['real_index'], reverse=True)
+    return data
+
+
+def main():
+    data = build()
+
+    # ── Write (versioned snapshot + patches) ──
+    snapshots.publish(data)
+
+    print(f'✅ Wrote {len(data)} provinces → {OUT_PATH.resolve()}')
+    print()
+    print(f'{"Province":<6} {"RealW":>6} {"Basket":>7} {"Index":>6} {"Lv":>3}  Verdict')
+    print('─' * 80)
+    for d in data:
+        print(f'{d["name"]:<6} ¥{d["real_wage"]:>5.1f} ¥{d["basket_price"]:>6.1f} {d["real_index"]:>6.2f} {d["level"]:>3}  {d["verdict"]}')
 
-# ── Write ──
-out = os.path.join(os.path.dirname(__file__), '..', 'public', 'data', 'rpp_final.json')
-with open(out, 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
 
-print(f'✅ Wrote {len(data)} provinces → {os.path.abspath(out)}')
-print()
-print(f'{"Province":<6} {"RealW":>6} {"Basket":>7} {"Index":>6} {"Lv":>3}  Verdict')
-print('─' * 80)
-for d in data:
-    print(f'{d["name"]:<6} ¥{d["real_wage"]:>5.1f} ¥{d["basket_price"]:>6.1f} {d["real_index"]:>6.2f} {d["level"]:>3}  {d["verdict"]}')
+if __name__ == '__main__':
+    main()
@@ -12,25 +12,26 @@ Formula:
 import json
 from pathlib import Path
 
+import snapshots
+
 DATA_PATH = Path(__file__).parent.parent / "public" / "data" / "rpp_final.json"
 WAGE_MULTIPLIER = 0.45
 
 
-def main():
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    print(f"📂 Loaded {len(data)} provinces from {DATA_PATH}\n")
-    print(f"  {'Province':<8}  {'Wage':>6} → {'Real':>6}  {'Index':>6} → {'Real':>6}")
-    print(f"  {'─' * 8}  {'─' * 6}   {'─' * 6}  {'─' * 6}   {'─' * 6}")
-
+def adjust(data: list[dict]) -> list[dict]:
+    """Add real_wage / real_index to every province and sort by real_index."""
     for item in data:
         item["real_wage"] = round(item["wage"] * WAGE_MULTIPLIER, 2)
         item["real_index"] = round(item["real_wage"] / item["basket_price"], 2)
 
     # Sort by real_index descending
     data.sort(key=lambda x: x["real_index"], reverse=True)
+    return data
+
 
+def print_table(data: list[dict]) -> None:
+    print(f"  {'Province':<8}  {'Wage':>6} → {'Real':>6}  {'Index':>6} → {'Real':>6}")
+    print(f"  {'─' * 8}  {'─' * 6}   {'─' * 6}  {'─' * 6}   {'─' * 6}")
     for item in data:
         print(
             f"  {item['name']:<8}"
@@ -38,8 +39,15 @@ def main():
             f"  {item['index']:>6.2f} → {item['real_index']:>6.2f}"
         )
 
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def main():
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    print(f"📂 Loaded {len(data)} provinces from {DATA_PATH}\n")
+    print_table(adjust(data))
+
+    snapshots.publish(data, DATA_PATH.parent)
 
     print(f"\n✅ Updated {DATA_PATH}")
     print(f"   Added fields: real_wage, real_index (multiplier: {WAGE_MULTIPLIER})")
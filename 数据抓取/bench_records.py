@@ -0,0 +1,64 @@
+"""
+Memory Benchmark: list[dict] vs PriceTable
+==========================================
+Builds N synthetic rows shaped like raw_supermarket_data.json (names and
+units drawn from the mock generator, prices randomized per row) and
+measures the bytes per row held by each representation with tracemalloc.
+
+Usage:
+    python bench_records.py            # 100,000 rows
+    python bench_records.py 1000000    # custom row count
+"""
+
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from processor import normalize_price
+from records import PriceTable
+from scraper import mock_data_generator
+
+
+def make_rows(n: int) -> list[dict]:
+    """Rows decoded from JSON, so every dict owns fresh key/value strings."""
+    templates = mock_data_generator()
+    rows = []
+    for i in range(n):
+        row = dict(templates[i % len(templates)])
+        row["price"] = round(row["price"] * random.uniform(0.8, 1.2), 1)
+        rows.append(row)
+    return json.loads(json.dumps(rows, ensure_ascii=False))
+
+
+def measure(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def main(n: int = 100_000):
+    encoded = json.dumps(make_rows(n), ensure_ascii=False)
+
+    print(f"📏 Measuring {n:,} rows...")
+    rows, dict_bytes = measure(lambda: json.loads(encoded))
+    del rows
+    # Decode again so the table's interned strings are counted against it
+    table, table_bytes = measure(
+        lambda: PriceTable.from_rows(json.loads(encoded), normalize_price).sort()
+    )
+
+    print(f"\n   {'Layout':<12}  {'Total':>12}  {'Bytes/row':>10}")
+    print(f"   {'─' * 12}  {'─' * 12}  {'─' * 10}")
+    print(f"   {'list[dict]':<12}  {dict_bytes:>12,}  {dict_bytes / n:>10.1f}")
+    print(f"   {'PriceTable':<12}  {table_bytes:>12,}  {table_bytes / n:>10.1f}")
+    print(f"\n✅ {dict_bytes / table_bytes:.1f}× smaller")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
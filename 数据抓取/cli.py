@@ -0,0 +1,251 @@
+"""
+Survival Map Pipeline CLI
+=========================
+One entry point for every data stage. Each subcommand imports its module
+only when it runs, so --help and the light stages do not pay for
+Playwright, asyncio or the other stages.
+
+Usage:
+    python cli.py scrape [--mock] [--fill-mock]   # scraper.py
+    python cli.py process [--generate]            # processor.py
+    python cli.py adjust-wages                    # adjust_wages.py
+    python cli.py gen-final                       # scripts/gen_final.py
+    python cli.py gen-2026                        # scripts/gen_2026_data.py
+    python cli.py serve [--host H] [--port P]     # service.py
+    python cli.py loadtest [loadtest.py options]
+    python cli.py bench-records [N]
+    python cli.py watch [--interval S] [--serve]  # long-running, see below
+
+watch keeps the parsed PriceTable, baskets and published output in
+memory. Each poll stats raw_supermarket_data.json, and only a changed
+content hash re-runs parse → outlier filter → baskets. Publishing
+(process + adjust-wages in one snapshot) and the query index rebuild
+only happen when the baskets actually changed. With --serve the query
+service runs in the same process and is hot-swapped to the new index.
+"""
+
+import argparse
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+
+
+# ---------------------------------------------------------------------------
+# One-shot subcommands
+# ---------------------------------------------------------------------------
+def cmd_scrape(args):
+    import scraper
+    scraper.main(use_mock=args.mock, fill_mock=args.fill_mock)
+
+
+def cmd_process(args):
+    import processor
+    processor.main(generate_only=args.generate)
+
+
+def cmd_adjust_wages(args):
+    import adjust_wages
+    adjust_wages.main()
+
+
+def cmd_gen_final(args):
+    sys.path.insert(0, SCRIPTS_DIR)
+    import gen_final
+    gen_final.main()
+
+
+def cmd_gen_2026(args):
+    sys.path.insert(0, SCRIPTS_DIR)
+    import gen_2026_data
+    gen_2026_data.main()
+
+
+def cmd_serve(args):
+    import service
+    service.main(["--host", args.host, "--port", str(args.port)])
+
+
+def cmd_loadtest(args):
+    import loadtest
+    loadtest.main(args.extra)
+
+
+def cmd_bench_records(args):
+    import bench_records
+    bench_records.main(args.rows)
+
+
+# ---------------------------------------------------------------------------
+# Watch mode
+# ---------------------------------------------------------------------------
+class Pipeline:
+    """
+    Warm, memoized processor pipeline. Each stage is keyed on the output of
+    the stage before it, so an unchanged input stops propagation early.
+    """
+
+    def __init__(self):
+        import processor
+        self.processor = processor
+        self.raw_stat: tuple[int, int] | None = None
+        self.raw_hash: str | None = None
+        self.table = None
+        self.baskets: dict[str, float] | None = None
+        self.output: list[dict] | None = None
+
+    def refresh(self) -> bool:
+        """
+        Re-run whatever the current raw file invalidates. True if output changed.
+
+        A raw file that cannot be read or parsed (e.g. caught half-written)
+        is logged and skipped: the last good table and output stay in
+        place and the file's stat/hash are not recorded, so the next poll
+        tries it again.
+        """
+        raw_path = self.processor.RAW_PATH
+        try:
+            st = raw_path.stat()
+            stat = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stat = None
+
+        if stat == self.raw_stat and self.output is not None:
+            return False
+
+        try:
+            return self._rebuild(stat)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️  Refresh from {raw_path.name} failed ({e!r}); keeping the last good data")
+            return False
+
+    def _rebuild(self, stat: tuple[int, int] | None) -> bool:
+        import hashlib
+
+        raw_path = self.processor.RAW_PATH
+        raw_hash = hashlib.sha1(raw_path.read_bytes()).hexdigest() if stat else None
+        if raw_hash == self.raw_hash and self.output is not None:
+            self.raw_stat = stat
+            return False
+
+        # Stage 1: parse + outlier filter + baskets
+        if stat:
+            table = self.processor.load_raw()
+            print("\n🧮 Normalizing prices and calculating baskets...")
+            baskets = self.processor.process_scraped_data(table)
+        else:
+            print(f"⚠️  {raw_path} not found. Using estimated data for all provinces.")
+            table, baskets = None, None
+
+        if baskets == self.baskets and self.output is not None:
+            print("📌 Baskets unchanged, skipping publish")
+            self.raw_stat, self.raw_hash, self.table = stat, raw_hash, table
+            return False
+
+        # Stage 2: final output + real wage, published as one version
+        import adjust_wages
+        import snapshots
+        output = adjust_wages.adjust(self.processor.generate_final_output(baskets))
+        snapshots.publish(output)
+
+        self.raw_stat, self.raw_hash, self.table = stat, raw_hash, table
+        self.baskets, self.output = baskets, output
+        return True
+
+
+def cmd_watch(args):
+    pipeline = Pipeline()
+    pipeline.refresh()
+    print(f"\n👀 Watching {pipeline.processor.RAW_PATH} every {args.interval:g}s (Ctrl-C to stop)")
+
+    try:
+        if args.serve:
+            import asyncio
+            asyncio.run(_watch_and_serve(pipeline, args))
+        else:
+            import time
+            while True:
+                time.sleep(args.interval)
+                pipeline.refresh()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+async def _watch_and_serve(pipeline: Pipeline, args) -> None:
+    import asyncio
+    import service
+
+    svc = service.QueryService(service.PriceIndex(pipeline.table))
+    server = await service.start(svc, args.host, args.port)
+    async with server:
+        while True:
+            await asyncio.sleep(args.interval)
+            # Parsing and publishing are blocking; keep them off the event loop
+            if await asyncio.to_thread(pipeline.refresh):
+                svc.reload(service.PriceIndex(pipeline.table))
+                print(f"🔄 Query index reloaded ({svc.index.version})")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Survival map data pipeline")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    p = sub.add_parser("scrape", help="scrape supermarket prices")
+    p.add_argument("--mock", action="store_true", help="generate mock data only")
+    p.add_argument("--fill-mock", action="store_true", help="backfill failed pairs with mock rows")
+    p.set_defaults(func=cmd_scrape)
+
+    p = sub.add_parser("process", help="raw prices → rpp_final.json")
+    p.add_argument("--generate", action="store_true", help="ignore raw data, use estimates only")
+    p.set_defaults(func=cmd_process)
+
+    p = sub.add_parser("adjust-wages", help="add real_wage / real_index to rpp_final.json")
+    p.set_defaults(func=cmd_adjust_wages)
+
+    p = sub.add_parser("gen-final", help="write the hardcore reality dataset")
+    p.set_defaults(func=cmd_gen_final)
+
+    p = sub.add_parser("gen-2026", help="write the 2026 wage / tier dataset")
+    p.set_defaults(func=cmd_gen_2026)
+
+    for name, func, help_text in (
+        ("serve", cmd_serve, "run the custom basket query service"),
+        ("watch", cmd_watch, "keep data warm and rerun stages when inputs change"),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=8765)
+        p.set_defaults(func=func)
+    p.add_argument("--interval", type=float, default=1.0, help="poll interval in seconds")
+    p.add_argument("--serve", action="store_true", help="also serve /rank from the warm index")
+
+    # Listed for --help only; main() forwards its arguments to loadtest.py
+    p = sub.add_parser("loadtest", add_help=False,
+                       help="load test the query service (options are passed through)")
+    p.add_argument("extra", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_loadtest)
+
+    p = sub.add_parser("bench-records", help="memory benchmark: list[dict] vs PriceTable")
+    p.add_argument("rows", type=int, nargs="?", default=100_000)
+    p.set_defaults(func=cmd_bench_records)
+
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    parser = build_parser()
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["loadtest"]:
+        # REMAINDER does not capture options that come first (e.g. --help),
+        # so hand everything after the subcommand to loadtest.py unparsed
+        cmd_loadtest(argparse.Namespace(extra=argv[1:]))
+        return
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Load Test for service.py
+========================
+Starts the query service in a subprocess (unless --no-spawn), then drives
+it with keep-alive asyncio clients. Queries follow a skewed popularity
+mix over a pool of custom baskets, and a share of requests revalidate
+with If-None-Match, so LRU hits, misses and 304s are all exercised.
+
+Reports throughput plus p50/p90/p99 end-to-end latency, split by status.
+
+Usage:
+    python loadtest.py                           # 20k requests, 32 connections
+    python loadtest.py --requests 100000 --concurrency 64
+    python loadtest.py --no-spawn --port 8765    # against a running service
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ALIASES = ["pork", "eggs", "rice", "oil", "milk"]
+
+
+def make_queries(pool: int, seed: int = 7) -> list[str]:
+    """A pool of distinct /rank targets; index 0 is the default basket."""
+    rng = random.Random(seed)
+    queries = ["/rank"]
+    while len(queries) < pool:
+        parts = [f"{a}={rng.choice([0, 0.5, 1, 2, 3])}" for a in rng.sample(ALIASES, rng.randint(1, 3))]
+        parts.append(f"multiplier={rng.choice([0.45, 0.6, 1, 1.5])}")
+        queries.append("/rank?" + "&".join(parts))
+    return queries
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    k = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def client(host: str, port: int, queries: list[str], weights: list[float],
+                 n: int, revalidate: float, samples: dict[int, list[float]]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    etags: dict[str, str] = {}
+    rng = random.Random()
+    try:
+        for _ in range(n):
+            target = rng.choices(queries, weights)[0]
+            request = f"GET {target} HTTP/1.1\r\nHost: {host}\r\n"
+            if target in etags and rng.random() < revalidate:
+                request += f"If-None-Match: {etags[target]}\r\n"
+
+            start = time.perf_counter()
+            writer.write((request + "\r\n").encode("latin-1"))
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head[9:12])
+            length = 0
+            for line in head.decode("latin-1").split("\r\n")[1:]:
+                name, _, value = line.partition(":")
+                name = name.lower()
+                if name == "content-length":
+                    length = int(value)
+                elif name == "etag":
+                    etags[target] = value.strip()
+            if length:
+                await reader.readexactly(length)
+            samples.setdefault(status, []).append((time.perf_counter() - start) * 1000)
+    finally:
+        writer.close()
+
+
+async def wait_for_port(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def run(args) -> None:
+    queries = make_queries(args.pool)
+    # Zipf-like popularity: a handful of baskets get most of the traffic
+    weights = [1 / (rank + 1) for rank in range(len(queries))]
+    samples: dict[int, list[float]] = {}
+
+    await wait_for_port(args.host, args.port)
+
+    per_client = args.requests // args.concurrency
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(args.host, args.port, queries, weights, per_client, args.revalidate, samples)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(v) for v in samples.values())
+    print(f"\n✅ {total:,} requests in {elapsed:.2f}s → {total / elapsed:,.0f} req/s "
+          f"({args.concurrency} connections, {len(queries)} distinct baskets)\n")
+    print(f"   {'Status':<7}  {'Count':>8}  {'p50 ms':>8}  {'p90 ms':>8}  {'p99 ms':>8}")
+    print(f"   {'─' * 7}  {'─' * 8}  {'─' * 8}  {'─' * 8}  {'─' * 8}")
+    rows = sorted(samples.items()) + [("all", [x for v in samples.values() for x in v])]
+    for status, values in rows:
+        values.sort()
+        print(f"   {status!s:<7}  {len(values):>8,}  {percentile(values, 50):>8.3f}"
+              f"  {percentile(values, 90):>8.3f}  {percentile(values, 99):>8.3f}")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Load test the custom basket query service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pool", type=int, default=200, help="distinct baskets in the query mix")
+    parser.add_argument("--revalidate", type=float, default=0.3,
+                        help="share of repeat requests sent with If-None-Match")
+    parser.add_argument("--no-spawn", action="store_true", help="use an already running service")
+    args = parser.parse_args(argv)
+
+    proc = None
+    if not args.no_spawn:
+        service = Path(__file__).parent / "service.py"
+        proc = subprocess.Popen(
+            [sys.executable, str(service), "--host", args.host, "--port", str(args.port)],
+            stdout=subprocess.DEVNULL,
+        )
+    try:
+        asyncio.run(run(args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
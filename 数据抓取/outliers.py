@@ -0,0 +1,128 @@
+"""
+Outlier Rejection: Median Absolute Deviation
+=============================================
+Drops mis-parsed rows before basket aggregation. Works on the log of the
+normalized price (per 500g), since parsing errors are multiplicative:
+a lost decimal point or a wrong pack size is off by a factor, not an
+offset.
+
+A row is rejected if it is
+    - unparsable   → no usable per-500g price
+    - city_mad     → robust z-score > MAD_THRESHOLD within its (city, keyword)
+    - keyword_mad  → robust z-score > MAD_THRESHOLD within its keyword, all cities
+
+robust z = 0.6745 * (x - median) / MAD  (Iglewicz & Hoaglin). MAD is
+floored at MAD_FLOOR so tight groups do not flag ordinary noise.
+
+A single scrape keeps the top 3 cards per search, so (city, keyword)
+groups are tiny. They are judged from MIN_CITY_GROUP = 3 valid rows (the
+median of 3 still ignores one bad row), but a 3-row MAD is set by one
+neighbour and too noisy to use as the scale. Groups smaller than
+MIN_KEYWORD_GROUP therefore borrow a pooled scale instead: the median,
+over all cities, of each row's distance from its own city median for
+that keyword. Keyword-wide groups need MIN_KEYWORD_GROUP valid rows.
+
+Both group levels are computed from the sorted PriceTable columns in one
+scan: (city, keyword) groups are contiguous ranges, keyword groups are
+collected by keyword code.
+"""
+
+import math
+from statistics import median
+
+from records import PriceTable, runs
+
+MAD_THRESHOLD = 3.5
+MAD_FLOOR = 0.1         # in log space, ≈ ±10% price spread
+MIN_CITY_GROUP = 3
+MIN_KEYWORD_GROUP = 5
+
+
+def _stats(values: list[float], min_group: int) -> tuple[float, float] | None:
+    """(median, floored MAD) of ``values``, or None if the group is too small."""
+    if len(values) < min_group:
+        return None
+    m = median(values)
+    mad = median(abs(v - m) for v in values)
+    return m, max(mad, MAD_FLOOR)
+
+
+def _zscore(x: float, stats: tuple[float, float]) -> float:
+    m, mad = stats
+    return 0.6745 * (x - m) / mad
+
+
+def filter_outliers(table: PriceTable) -> tuple[PriceTable, list[dict]]:
+    """
+    Split ``table`` into (kept rows, rejected rows). Rejected rows are
+    returned as dicts with ``norm``, ``reason``, ``median`` and ``z``
+    (medians in ¥ per 500g) for the side file.
+    """
+    table.sort()
+    n = len(table)
+    log_norm = [math.log(p) if p > 0 else math.nan for p in table.norm]
+
+    # Keyword-wide stats: gather valid log prices per keyword code
+    by_keyword: dict[int, list[float]] = {}
+    for code, x in zip(table.keyword, log_norm):
+        if x == x:  # not NaN
+            by_keyword.setdefault(code, []).append(x)
+    keyword_stats = {code: _stats(values, MIN_KEYWORD_GROUP) for code, values in by_keyword.items()}
+
+    # (city, keyword) groups: contiguous runs inside each city run. Collect
+    # each group's median and pool the within-group deviations per keyword.
+    groups: list[tuple[int, int, int, list[float]]] = []
+    pooled: dict[int, list[float]] = {}
+    for _, city_start, city_stop in runs(table.city, 0, n):
+        for code, start, stop in runs(table.keyword, city_start, city_stop):
+            values = [x for x in log_norm[start:stop] if x == x]
+            if values:
+                m = median(values)
+                pooled.setdefault(code, []).extend(abs(v - m) for v in values)
+            groups.append((code, start, stop, values))
+    pooled_mad = {
+        code: max(median(devs), MAD_FLOOR)
+        for code, devs in pooled.items()
+        if len(devs) >= MIN_KEYWORD_GROUP
+    }
+
+    local_stats = [None] * n
+    for code, start, stop, values in groups:
+        if len(values) >= MIN_KEYWORD_GROUP:
+            stats = _stats(values, MIN_KEYWORD_GROUP)
+        elif len(values) >= MIN_CITY_GROUP and code in pooled_mad:
+            stats = (median(values), pooled_mad[code])
+        else:
+            continue
+        for i in range(start, stop):
+            local_stats[i] = stats
+
+    kept: list[int] = []
+    rejected: list[dict] = []
+    for i in range(n):
+        x = log_norm[i]
+        if x != x:
+            rejected.append({**table.row(i), "norm": None, "reason": "unparsable"})
+            continue
+
+        verdict = None
+        for reason, stats in (("city_mad", local_stats[i]), ("keyword_mad", keyword_stats[table.keyword[i]])):
+            if stats is not None:
+                z = _zscore(x, stats)
+                if abs(z) > MAD_THRESHOLD:
+                    verdict = (reason, stats, z)
+                    break
+
+        if verdict is None:
+            kept.append(i)
+        else:
+            reason, (m, _), z = verdict
+            rejected.append({
+                **table.row(i),
+                "norm": table.norm[i],
+                "reason": reason,
+                "median": round(math.exp(m), 2),
+                "z": round(z, 2),
+            })
+
+    return table.take(kept), rejected
@@ -2,8 +2,10 @@
 Data Processor: Raw Prices → Purchasing Power Index
 =====================================================
 1. Normalize all product prices to "per 500g (1斤)"
+   and drop MAD outliers (see outliers.py) into rejected_rows.json
 2. Calculate a "Survival Basket" cost per city/province
 3. Compute Purchasing Power Index = Hourly Wage / Basket Cost
+   (plus real_wage / real_index, see adjust_wages.py)
 4. Output rpp_final.json for the frontend map
 
 Usage:
@@ -16,6 +18,11 @@ import re
 import sys
 from pathlib import Path
 
+import adjust_wages
+import snapshots
+from outliers import filter_outliers
+from records import PriceTable, TableSlice
+
 # ---------------------------------------------------------------------------
 # Price normalizer
 # ---------------------------------------------------------------------------
@@ -99,33 +106,40 @@ BASKET_WEIGHTS = {
 }
 
 
-def calculate_basket(city_data: list[dict]) -> float | None:
+DEFAULT_PRICES = {"五花肉": 15, "散装鸡蛋": 6, "东北大米": 3, "金龙鱼大豆油": 6, "纯牛奶": 5}
+
+
+def calculate_basket(city_data: TableSlice | list[dict]) -> float | None:
     """
     Calculate the cost of a "Survival Basket" for a city.
     Uses the median normalized price for each category.
+
+    Accepts a TableSlice over one city's rows, or a list of raw dicts
+    (which is converted to a PriceTable first).
     """
-    category_prices: dict[str, list[float]] = {}
+    medians = category_medians(city_data)
+    basket_cost = sum(medians[keyword] * weight for keyword, weight in BASKET_WEIGHTS.items())
+    return round(basket_cost, 2)
 
-    for item in city_data:
-        keyword = item["keyword"]
-        norm = normalize_price(item["price"], item["product_name"] + " " + item.get("unit", ""))
-        if norm is not None and norm > 0:
-            category_prices.setdefault(keyword, []).append(norm)
 
-    basket_cost = 0.0
-    for keyword, weight in BASKET_WEIGHTS.items():
-        prices = category_prices.get(keyword, [])
+def category_medians(city_data: TableSlice | list[dict]) -> dict[str, float]:
+    """Median normalized price per basket category, with defaults for gaps."""
+    if not isinstance(city_data, TableSlice):
+        city_data = PriceTable.from_rows(city_data, normalize_price).sort().view()
+
+    category_prices = city_data.norm_prices()
+
+    medians: dict[str, float] = {}
+    for keyword in BASKET_WEIGHTS:
+        column = category_prices.get(keyword)
+        # NaN (unparsable) fails the > 0 test as well
+        prices = sorted(p for p in column if p > 0) if column is not None else []
         if not prices:
             # Use a reasonable default if category is missing
-            defaults = {"五花肉": 15, "散装鸡蛋": 6, "东北大米": 3, "金龙鱼大豆油": 6, "纯牛奶": 5}
-            median_price = defaults.get(keyword, 10)
+            medians[keyword] = DEFAULT_PRICES.get(keyword, 10)
         else:
-            prices.sort()
-            mid = len(prices) // 2
-            median_price = prices[mid]
-        basket_cost += median_price * weight
-
-    return round(basket_cost, 2)
+            medians[keyword] = prices[len(prices) // 2]
+    return medians
 
 
 # ---------------------------------------------------------------------------
@@ -167,20 +181,26 @@ PROVINCE_BASKET_ESTIMATES = {
 # ---------------------------------------------------------------------------
 # Process scraped data into per-province results
 # ---------------------------------------------------------------------------
-def process_scraped_data(raw_data: list[dict]) -> dict[str, float]:
+def process_scraped_data(raw_data: PriceTable | list[dict]) -> dict[str, float]:
     """Group raw data by city, calculate basket, map to province."""
-    city_groups: dict[str, list[dict]] = {}
-    for item in raw_data:
-        city_groups.setdefault(item["city"], []).append(item)
+    if not isinstance(raw_data, PriceTable):
+        raw_data = PriceTable.from_rows(raw_data, normalize_price)
 
     province_baskets: dict[str, float] = {}
-    for city, items in city_groups.items():
+    mock_backed: list[str] = []
+    for city, items in raw_data.by_city():
         province = CITY_TO_PROVINCE.get(city, city)
         basket = calculate_basket(items)
         if basket:
             province_baskets[province] = basket
-            print(f"  📦 {city} → {province}: basket = ¥{basket}")
-
+            mock_rows = items.count_source("mock")
+            note = f" (⚠️ {mock_rows}/{len(items)} mock rows)" if mock_rows else ""
+            if mock_rows:
+                mock_backed.append(province)
+            print(f"  📦 {city} → {province}: basket = ¥{basket}{note}")
+
+    if mock_backed:
+        print(f"  ⚠️  Baskets backed by mock rows: {', '.join(mock_backed)}")
     return province_baskets
 
 
@@ -209,48 +229,61 @@ def generate_final_output(province_baskets: dict[str, float] | None = None) -> l
     return results
 
 
+RAW_PATH = Path(__file__).parent / "raw_supermarket_data.json"
+REJECTED_PATH = Path(__file__).parent / "rejected_rows.json"
+
+
+def load_raw(raw_path: Path = RAW_PATH) -> PriceTable:
+    """Parse raw scraper output, drop outliers and record them in rejected_rows.json."""
+    print(f"📂 Loading raw data from {raw_path}...")
+    with open(raw_path, "r", encoding="utf-8") as f:
+        raw_data = PriceTable.from_rows(json.load(f), normalize_price)
+    print(f"   Loaded {len(raw_data)} items")
+
+    print("\n🧹 Rejecting outliers (MAD)...")
+    raw_data, rejected = filter_outliers(raw_data)
+    with open(REJECTED_PATH, "w", encoding="utf-8") as f:
+        json.dump(rejected, f, ensure_ascii=False, indent=2)
+    print(f"   Kept {len(raw_data)}, rejected {len(rejected)} → {REJECTED_PATH}")
+    return raw_data
+
+
+def print_summary(results: list[dict]) -> None:
+    print("\n📋 Summary:")
+    print(f"   {'Province':<8}  {'Wage':>5}  {'Basket':>7}  {'Index':>6}")
+    print(f"   {'─' * 8}  {'─' * 5}  {'─' * 7}  {'─' * 6}")
+    for r in results[:5]:
+        print(f"   {r['name']:<8}  ¥{r['wage']:>4}  ¥{r['basket_price']:>6}  {r['index']:>6}")
+    print(f"   ... ({len(results) - 10} more) ...")
+    for r in results[-5:]:
+        print(f"   {r['name']:<8}  ¥{r['wage']:>4}  ¥{r['basket_price']:>6}  {r['index']:>6}")
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
-def main():
-    generate_only = "--generate" in sys.argv
-
+def main(generate_only: bool = False):
     province_baskets = None
 
     if not generate_only:
-        raw_path = Path(__file__).parent / "raw_supermarket_data.json"
-        if raw_path.exists():
-            print(f"📂 Loading raw data from {raw_path}...")
-            with open(raw_path, "r", encoding="utf-8") as f:
-                raw_data = json.load(f)
-            print(f"   Loaded {len(raw_data)} items")
-
+        if RAW_PATH.exists():
+            raw_data = load_raw()
             print("\n🧮 Normalizing prices and calculating baskets...")
             province_baskets = process_scraped_data(raw_data)
         else:
-            print(f"⚠️  {raw_path} not found. Using estimated data for all provinces.")
+            print(f"⚠️  {RAW_PATH} not found. Using estimated data for all provinces.")
 
     print("\n📊 Generating final output for 31 provinces...")
-    results = generate_final_output(province_baskets)
+    results = adjust_wages.adjust(generate_final_output(province_baskets))
 
-    # Output to public/data/rpp_final.json
-    output_dir = Path(__file__).parent.parent / "public" / "data"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / "rpp_final.json"
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    # Output to public/data/rpp_final.json (+ versioned snapshot and patches),
+    # published once with real_wage / real_index already filled in
+    output_path = snapshots.DATA_DIR / "rpp_final.json"
+    snapshots.publish(results)
 
     print(f"\n✅ Saved {len(results)} provinces to {output_path}")
-    print("\n📋 Summary:")
-    print(f"   {'Province':<8}  {'Wage':>5}  {'Basket':>7}  {'Index':>6}")
-    print(f"   {'─' * 8}  {'─' * 5}  {'─' * 7}  {'─' * 6}")
-    for r in results[:5]:
-        print(f"   {r['name']:<8}  ¥{r['wage']:>4}  ¥{r['basket_price']:>6}  {r['index']:>6}")
-    print(f"   ... ({len(results) - 10} more) ...")
-    for r in results[-5:]:
-        print(f"   {r['name']:<8}  ¥{r['wage']:>4}  ¥{r['basket_price']:>6}  {r['index']:>6}")
+    print_summary(results)
 
 
 if __name__ == "__main__":
-    main()
+    main(generate_only="--generate" in sys.argv)
@@ -0,0 +1,228 @@
+"""
+Compact Price Records
+=====================
+Column-oriented storage for raw supermarket rows, replacing the list of
+dicts that scraper.py writes out.
+
+    - city / keyword  → interned integer codes (array 'H')
+    - rank            → array 'B'
+    - price / norm    → array 'd' (norm = price per 500g, NaN if unparsable)
+    - product_name / unit → sys.intern'd strings, shared between repeats
+    - source          → interned code (array 'B'); "" for live rows, "mock" for backfill
+
+After sort() the rows are ordered by (city, keyword), so every city and
+every (city, keyword) group is a contiguous index range. Grouping hands out
+TableSlice views and memoryviews over those ranges instead of new lists.
+"""
+
+import math
+import sys
+from array import array
+from typing import Callable, Iterable, Iterator
+
+
+# ---------------------------------------------------------------------------
+# String interning
+# ---------------------------------------------------------------------------
+class Interner:
+    """Bidirectional str ↔ small int mapping."""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+# ---------------------------------------------------------------------------
+# Price table
+# ---------------------------------------------------------------------------
+class PriceTable:
+    """Parallel columns holding one raw price row per index."""
+
+    __slots__ = (
+        "cities", "keywords", "sources",
+        "city", "keyword", "rank", "price", "norm", "source",
+        "product_name", "unit",
+        "is_sorted",
+    )
+
+    def __init__(self):
+        self.cities = Interner()
+        self.keywords = Interner()
+        self.sources = Interner()
+        self.sources.code("")
+        self.city = array("H")
+        self.keyword = array("H")
+        self.rank = array("B")
+        self.price = array("d")
+        self.norm = array("d")
+        self.source = array("B")
+        self.product_name: list[str] = []
+        self.unit: list[str] = []
+        self.is_sorted = False
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[dict],
+        normalize: Callable[[float, str], float | None] | None = None,
+    ) -> "PriceTable":
+        """
+        Build a table from scraper-style dicts. If ``normalize`` is given it
+        is called once per row as ``normalize(price, product_name + " " + unit)``
+        and the result is stored in the ``norm`` column.
+        """
+        table = cls()
+        for row in rows:
+            table.append(row, normalize)
+        return table
+
+    def append(
+        self,
+        row: dict,
+        normalize: Callable[[float, str], float | None] | None = None,
+    ) -> None:
+        name = sys.intern(row["product_name"])
+        unit = sys.intern(row.get("unit", ""))
+        price = float(row["price"])
+        norm = normalize(price, name + " " + unit) if normalize else None
+
+        self.city.append(self.cities.code(row["city"]))
+        self.keyword.append(self.keywords.code(row["keyword"]))
+        self.rank.append(min(int(row.get("rank", 0)), 255))
+        self.price.append(price)
+        self.norm.append(math.nan if norm is None else norm)
+        self.source.append(self.sources.code(row.get("source", "")))
+        self.product_name.append(name)
+        self.unit.append(unit)
+        self.is_sorted = False
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def row(self, i: int) -> dict:
+        """Materialize row ``i`` back into the scraper's dict format."""
+        row = {
+            "city": self.cities[self.city[i]],
+            "keyword": self.keywords[self.keyword[i]],
+            "rank": self.rank[i],
+            "product_name": self.product_name[i],
+            "price": self.price[i],
+            "unit": self.unit[i],
+        }
+        source = self.sources[self.source[i]]
+        if source:
+            row["source"] = source
+        return row
+
+    def sort(self) -> "PriceTable":
+        """Reorder all columns in place by (city, keyword, rank)."""
+        if self.is_sorted:
+            return self
+        city, keyword, rank = self.city, self.keyword, self.rank
+        order = sorted(range(len(self)), key=lambda i: (city[i], keyword[i], rank[i]))
+
+        for col in ("city", "keyword", "rank", "price", "norm", "source"):
+            old = getattr(self, col)
+            setattr(self, col, array(old.typecode, (old[i] for i in order)))
+        self.product_name = [self.product_name[i] for i in order]
+        self.unit = [self.unit[i] for i in order]
+        self.is_sorted = True
+        return self
+
+    def take(self, indices: Iterable[int]) -> "PriceTable":
+        """New table holding the given rows, in order; shares the interners."""
+        indices = list(indices)
+        table = PriceTable()
+        table.cities = self.cities
+        table.keywords = self.keywords
+        table.sources = self.sources
+        for col in ("city", "keyword", "rank", "price", "norm", "source"):
+            old = getattr(self, col)
+            setattr(table, col, array(old.typecode, (old[i] for i in indices)))
+        table.product_name = [self.product_name[i] for i in indices]
+        table.unit = [self.unit[i] for i in indices]
+        table.is_sorted = self.is_sorted and indices == sorted(indices)
+        return table
+
+    def view(self) -> "TableSlice":
+        return TableSlice(self, 0, len(self))
+
+    def by_city(self) -> Iterator[tuple[str, "TableSlice"]]:
+        """Yield (city, slice) for each contiguous city range. Sorts first."""
+        self.sort()
+        for code, start, stop in runs(self.city, 0, len(self)):
+            yield self.cities[code], TableSlice(self, start, stop)
+
+
+class TableSlice:
+    """A [start, stop) window over a sorted PriceTable. Holds no row data."""
+
+    __slots__ = ("table", "start", "stop")
+
+    def __init__(self, table: PriceTable, start: int, stop: int):
+        self.table = table
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def by_keyword(self) -> Iterator[tuple[str, int, int]]:
+        """Yield (keyword, start, stop) for each contiguous keyword range."""
+        t = self.table
+        for code, start, stop in runs(t.keyword, self.start, self.stop):
+            yield t.keywords[code], start, stop
+
+    def count_source(self, source: str) -> int:
+        """Number of rows in the slice tagged with ``source`` (e.g. "mock")."""
+        code = self.table.sources.codes.get(source)
+        if code is None:
+            return 0
+        return self.table.source[self.start:self.stop].count(code)
+
+    def norm_prices(self) -> dict[str, memoryview | array]:
+        """
+        Map keyword → its normalized prices. Within one city a keyword is a
+        single run and gets a memoryview (no copy); a slice spanning several
+        cities repeats keyword runs, which are concatenated into one array.
+        """
+        norm = memoryview(self.table.norm)
+        prices: dict[str, memoryview | array] = {}
+        for kw, start, stop in self.by_keyword():
+            run = norm[start:stop]
+            if kw not in prices:
+                prices[kw] = run
+            else:
+                merged = prices[kw]
+                if isinstance(merged, memoryview):
+                    merged = prices[kw] = array("d", merged)
+                merged.extend(run)
+        return prices
+
+
+def runs(column: array, start: int, stop: int) -> Iterator[tuple[int, int, int]]:
+    """Yield (value, run_start, run_stop) for runs of equal values in column[start:stop]."""
+    i = start
+    while i < stop:
+        value = column[i]
+        j = i + 1
+        while j < stop and column[j] == value:
+            j += 1
+        yield value, i, j
+        i = j
@@ -4,8 +4,13 @@ Supermarket Price Scraper for Cost of Living Project
 Uses Playwright to scrape prices from Yonghui Life (yhlife.com) with
 geolocation mocking. Includes a mock_data_generator fallback for testing.
 
+Searches are paced by an AIMD throttle, retried with jittered backoff under
+a run-wide retry budget, and skipped once a city's circuit breaker opens.
+The outcome of every (city, keyword) pair is written to scrape_status.json.
+
 Usage:
     python scraper.py              # Attempt live scraping
+    python scraper.py --fill-mock  # Live scraping, backfill failed pairs with mock rows
     python scraper.py --mock       # Generate mock data only
 """
 
@@ -32,8 +37,12 @@ KEYWORDS = ["五花肉", "散装鸡蛋", "东北大米", "金龙鱼大豆油", "
 # ---------------------------------------------------------------------------
 # Mock data generator (realistic fallback)
 # ---------------------------------------------------------------------------
-def mock_data_generator() -> list[dict]:
-    """Generate realistic mock supermarket data for testing downstream logic."""
+def mock_data_generator(pairs: set[tuple[str, str]] | None = None) -> list[dict]:
+    """
+    Generate realistic mock supermarket data for testing downstream logic.
+    If ``pairs`` is given, only those (city, keyword) combinations are produced.
+    Every row carries ``"source": "mock"`` so it cannot pass for scraped data.
+    """
 
     # Realistic price ranges per keyword per city (min, max per common unit)
     price_templates = {
@@ -87,6 +96,8 @@ def mock_data_generator() -> list[dict]:
     results = []
     for city in CITIES:
         for keyword in KEYWORDS:
+            if pairs is not None and (city, keyword) not in pairs:
+                continue
             tpl = price_templates[keyword]
             for i in range(3):  # 3 results per keyword
                 unit = tpl["units"][i]
@@ -126,30 +137,216 @@ def mock_data_generator() -> list[dict]:
                     "product_name": name,
                     "price": price,
                     "unit": unit,
+                    "source": "mock",
                 })
 
     return results
 
 
+# ---------------------------------------------------------------------------
+# Request pacing, circuit breakers and retry budget
+# ---------------------------------------------------------------------------
+class AimdThrottle:
+    """
+    Additive-increase / multiplicative-decrease pacing between searches.
+
+    Every clean search raises the request rate by ``increase`` req/s; a
+    timeout or an empty result page multiplies it by ``decrease``. Over a
+    run the rate settles just below what the site tolerates.
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.3,
+        min_rate: float = 0.05,
+        max_rate: float = 1.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        jitter: float = 0.2,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self._last_start: float | None = None
+
+    @property
+    def interval(self) -> float:
+        """Target seconds between the starts of two consecutive requests."""
+        return 1.0 / self.rate
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_congestion(self) -> None:
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+
+    def wait(self) -> None:
+        """Sleep until the next request may start, then mark it as started."""
+        now = time.monotonic()
+        if self._last_start is not None:
+            target = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            delay = target - (now - self._last_start)
+            if delay > 0:
+                print(f"    ⏳ Waiting {delay:.1f}s (rate {self.rate:.2f} req/s)...")
+                time.sleep(delay)
+        self._last_start = time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    Per-city breaker: opens after ``threshold`` consecutive failed attempts
+    (retries included) and stays open for the rest of the run. Since every
+    attempt counts, a dead city spends at most ``threshold - 1`` retries
+    before it is cut off, which stays inside the run-wide retry budget's
+    floor and leaves retries for the other cities.
+    """
+
+    def __init__(self, threshold: int = 4):
+        self.threshold = threshold
+        self.failures = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.failures >= self.threshold
+
+    def record_success(self) -> None:
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+
+
+class RetryBudget:
+    """
+    Caps retries across the whole run at ``min_retries`` plus ``ratio`` of
+    first attempts, so a widespread outage cannot multiply the request load.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 5):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+
+    def record_request(self) -> None:
+        self.requests += 1
+
+    def try_spend(self) -> bool:
+        if self.retries >= self.min_retries + self.ratio * self.requests:
+            return False
+        self.retries += 1
+        return True
+
+
+def backoff_delay(attempt: int, base: float = 2.0, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+MAX_ATTEMPTS = 3
+
+
 # ---------------------------------------------------------------------------
 # Live scraper (Playwright)
 # ---------------------------------------------------------------------------
-def scrape_live() -> list[dict]:
-    """Attempt to scrape prices from Yonghui Life using Playwright."""
+def parse_price(text: str) -> float:
+    """
+    First number in a price label, e.g. "¥12.9/斤 原价25" → 12.9.
+    (Stripping all non-digits would glue the list price on: 12.925.)
+    """
+    match = re.search(r"\d+(?:\.\d+)?", text.replace(",", ""))
+    return float(match.group(0)) if match else 0.0
+
+
+def _search(page, keyword: str) -> list[dict]:
+    """Run one search and parse up to 3 product cards (without city/keyword)."""
+    search_url = f"https://www.yhlife.com/search?keyword={keyword}"
+    page.goto(search_url, timeout=15000)
+    page.wait_for_timeout(3000)
+
+    # Try to extract product cards
+    items = page.query_selector_all(".product-card, .goods-item, .search-item")[:3]
+
+    if not items:
+        # Fallback: try broader selectors
+        items = page.query_selector_all("[class*='product'], [class*='goods']")[:3]
+
+    rows = []
+    for rank, item in enumerate(items, 1):
+        try:
+            name_el = item.query_selector(
+                ".product-name, .goods-name, .title, h3, h4, [class*='name']"
+            )
+            price_el = item.query_selector(
+                ".price, .product-price, [class*='price'], .num"
+            )
+            product_name = name_el.inner_text().strip() if name_el else keyword
+            price_text = price_el.inner_text().strip() if price_el else "0"
+            price_val = parse_price(price_text)
+
+            # Try to extract unit from product name
+            unit_match = re.search(
+                r"(\d+(?:\.\d+)?)\s*(kg|g|ml|L|斤|枚|盒|袋|瓶)",
+                product_name, re.IGNORECASE,
+            )
+            unit = unit_match.group(0) if unit_match else ""
+
+            rows.append({
+                "rank": rank,
+                "product_name": product_name,
+                "price": price_val,
+                "unit": unit,
+            })
+        except Exception as e:
+            print(f"    ⚠️  Error parsing item {rank}: {e}")
+
+    return rows
+
+
+def scrape_live(fill_mock: bool = False) -> tuple[list[dict], list[dict]]:
+    """
+    Attempt to scrape prices from Yonghui Life using Playwright.
+
+    Returns ``(results, status)`` where ``status`` has one entry per
+    (city, keyword) pair: ``ok``, ``empty``, ``timeout``, ``error`` or
+    ``circuit_open``, plus the attempt count and last error. Failed pairs
+    are only backfilled from ``mock_data_generator()`` when ``fill_mock``
+    is set, and those rows carry ``"source": "mock"``.
+    """
     try:
         from playwright.sync_api import sync_playwright
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
     except ImportError:
         print("❌ playwright not installed. Run: pip install playwright && playwright install")
-        print("⚠️  Falling back to mock data generator.")
-        return mock_data_generator()
+        status = [
+            {"city": city, "keyword": keyword, "status": "error", "attempts": 0,
+             "items": 0, "error": "playwright not installed"}
+            for city in CITIES
+            for keyword in KEYWORDS
+        ]
+        if not fill_mock:
+            return [], status
+        print("💡 Backfilling every pair with mock rows (marked source=mock).")
+        for s in status:
+            s["filled_with_mock"] = True
+        return mock_data_generator(), status
 
     results = []
+    status = []
+    throttle = AimdThrottle()
+    budget = RetryBudget()
 
     with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+
         for city_name, geo in CITIES.items():
             print(f"\n🏙️  Scraping {city_name} (lat={geo['latitude']}, lng={geo['longitude']})...")
+            breaker = CircuitBreaker()
 
-            context = p.chromium.launch(headless=True).new_context(
+            context = browser.new_context(
                 geolocation=geo,
                 permissions=["geolocation"],
                 locale="zh-CN",
@@ -162,89 +359,125 @@ def scrape_live() -> list[dict]:
             page = context.new_page()
 
             for keyword in KEYWORDS:
+                entry = {
+                    "city": city_name,
+                    "keyword": keyword,
+                    "status": "circuit_open",
+                    "attempts": 0,
+                    "items": 0,
+                    "error": None,
+                }
+                status.append(entry)
+
+                if breaker.is_open:
+                    print(f"  ⛔ Skipping {keyword}: circuit open for {city_name}")
+                    continue
+
                 print(f"  🔍 Searching: {keyword}")
-                try:
-                    search_url = f"https://www.yhlife.com/search?keyword={keyword}"
-                    page.goto(search_url, timeout=15000)
-                    page.wait_for_timeout(3000)
-
-                    # Try to extract product cards
-                    items = page.query_selector_all(".product-card, .goods-item, .search-item")[:3]
-
-                    if not items:
-                        # Fallback: try broader selectors
-                        items = page.query_selector_all("[class*='product'], [class*='goods']")[:3]
-
-                    for rank, item in enumerate(items, 1):
-                        try:
-                            name_el = item.query_selector(
-                                ".product-name, .goods-name, .title, h3, h4, [class*='name']"
-                            )
-                            price_el = item.query_selector(
-                                ".price, .product-price, [class*='price'], .num"
-                            )
-                            product_name = name_el.inner_text().strip() if name_el else keyword
-                            price_text = price_el.inner_text().strip() if price_el else "0"
-                            price_val = float(re.sub(r"[^\d.]", "", price_text) or "0")
-
-                            # Try to extract unit from product name
-                            unit_match = re.search(
-                                r"(\d+(?:\.\d+)?)\s*(kg|g|ml|L|斤|枚|盒|袋|瓶)",
-                                product_name, re.IGNORECASE,
-                            )
-                            unit = unit_match.group(0) if unit_match else ""
-
-                            results.append({
-                                "city": city_name,
-                                "keyword": keyword,
-                                "rank": rank,
-                                "product_name": product_name,
-                                "price": price_val,
-                                "unit": unit,
-                            })
-                        except Exception as e:
-                            print(f"    ⚠️  Error parsing item {rank}: {e}")
-
-                except Exception as e:
-                    print(f"    ❌ Failed to search '{keyword}': {e}")
-
-                # Anti-blocking delay
-                delay = random.uniform(2, 5)
-                print(f"    ⏳ Waiting {delay:.1f}s...")
-                time.sleep(delay)
+                budget.record_request()
+
+                for attempt in range(MAX_ATTEMPTS):
+                    if attempt > 0:
+                        if breaker.is_open:
+                            print(f"    ⛔ Circuit opened for {city_name}, not retrying")
+                            break
+                        if not budget.try_spend():
+                            print("    🪫 Retry budget exhausted")
+                            break
+                        delay = backoff_delay(attempt)
+                        print(f"    🔁 Retry {attempt}/{MAX_ATTEMPTS - 1} in {delay:.1f}s...")
+                        time.sleep(delay)
+
+                    throttle.wait()
+                    entry["attempts"] += 1
+                    try:
+                        rows = _search(page, keyword)
+                    except PlaywrightTimeoutError as e:
+                        entry["status"], entry["error"] = "timeout", str(e)
+                        throttle.on_congestion()
+                        breaker.record_failure()
+                        print(f"    ⌛ Timed out searching '{keyword}'")
+                        continue
+                    except Exception as e:
+                        entry["status"], entry["error"] = "error", str(e)
+                        breaker.record_failure()
+                        print(f"    ❌ Failed to search '{keyword}': {e}")
+                        continue
+
+                    if not rows:
+                        entry["status"], entry["error"] = "empty", None
+                        throttle.on_congestion()
+                        breaker.record_failure()
+                        print(f"    🫙 No results for '{keyword}'")
+                        continue
+
+                    throttle.on_success()
+                    breaker.record_success()
+                    entry["status"], entry["error"] = "ok", None
+                    entry["items"] = len(rows)
+                    for row in rows:
+                        results.append({"city": city_name, "keyword": keyword, **row})
+                    break
 
             context.close()
 
-    # If scraping yielded very few results, supplement with mock data
-    if len(results) < 10:
-        print(f"\n⚠️  Only scraped {len(results)} items. Website may have changed structure.")
-        print("💡 Supplementing with mock data for testing.")
-        results = mock_data_generator()
+        browser.close()
+
+    failed = [s for s in status if s["status"] != "ok"]
+    if failed:
+        print(f"\n⚠️  {len(failed)}/{len(status)} city/keyword pairs failed:")
+        for s in failed:
+            print(f"   {s['city']} / {s['keyword']}: {s['status']} after {s['attempts']} attempt(s)")
+
+        if fill_mock:
+            pairs = {(s["city"], s["keyword"]) for s in failed}
+            filler = mock_data_generator(pairs)
+            results.extend(filler)
+            for s in failed:
+                s["filled_with_mock"] = True
+            print(f"💡 Backfilled {len(filler)} mock rows (marked source=mock).")
+
+    return results, status
 
-    return results
+
+def _mock_status() -> list[dict]:
+    """Status entries for a run produced entirely by the mock generator."""
+    return [
+        {"city": city, "keyword": keyword, "status": "mock", "attempts": 0, "items": 3, "error": None}
+        for city in CITIES
+        for keyword in KEYWORDS
+    ]
 
 
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
-def main():
-    use_mock = "--mock" in sys.argv
-
+def main(use_mock: bool = False, fill_mock: bool = False):
     if use_mock:
         print("🎲 Generating mock data...")
-        data = mock_data_generator()
+        data, status = mock_data_generator(), _mock_status()
     else:
         print("🌐 Attempting live scrape...")
-        data = scrape_live()
+        data, status = scrape_live(fill_mock=fill_mock)
+
+    status_path = Path(__file__).parent / "scrape_status.json"
+    with open(status_path, "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False, indent=2)
 
     output_path = Path(__file__).parent / "raw_supermarket_data.json"
+    if not data:
+        print(f"\n❌ Nothing scraped; kept existing {output_path}")
+        print(f"   Status: {status_path}")
+        return
+
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
     print(f"\n✅ Saved {len(data)} items to {output_path}")
+    print(f"   Status: {status_path}")
     print(f"   Cities: {sorted(set(d['city'] for d in data))}")
     print(f"   Keywords: {sorted(set(d['keyword'] for d in data))}")
 
 
 if __name__ == "__main__":
-    main()
+    main(use_mock="--mock" in sys.argv, fill_mock="--fill-mock" in sys.argv)
@@ -0,0 +1,345 @@
+"""
+Custom Basket Query Service
+===========================
+A small asyncio HTTP server that ranks all 31 provinces for a user-defined
+basket, without re-running the batch scripts.
+
+At startup the per-province, per-category normalized prices are loaded
+into a PriceIndex (scraped medians where available, otherwise the
+province estimate split by the default category mix). Each query is a
+weighted sum over that index; rendered responses are kept in an LRU and
+served with an ETag, so repeat requests with If-None-Match get a 304.
+
+Endpoint:
+    GET /rank?milk=0&rice=2&multiplier=0.45
+
+    Category weights (units of 500g) may be given by alias
+    (pork, eggs, rice, oil, milk) or by keyword (五花肉, ...). Unset
+    categories keep their BASKET_WEIGHTS value. ``multiplier`` scales the
+    hourly wage (e.g. 0.45 for the "real wage" view); default 1.0.
+    Other parameters (e.g. cache-busters like ``_=123``) are ignored.
+
+Usage:
+    python service.py                  # Serve on 127.0.0.1:8765
+    python service.py --port 9000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from processor import (
+    BASKET_WEIGHTS,
+    CITY_TO_PROVINCE,
+    DEFAULT_PRICES,
+    PROVINCE_BASKET_ESTIMATES,
+    PROVINCE_WAGES,
+    category_medians,
+    normalize_price,
+)
+from outliers import filter_outliers
+from records import PriceTable
+
+RAW_PATH = Path(__file__).parent / "raw_supermarket_data.json"
+
+CATEGORY_ALIASES = {
+    "pork": "五花肉",
+    "eggs": "散装鸡蛋",
+    "rice": "东北大米",
+    "oil": "金龙鱼大豆油",
+    "milk": "纯牛奶",
+}
+
+MAX_WEIGHT = 100.0
+CACHE_SIZE = 256
+
+
+class QueryError(ValueError):
+    """Raised for a malformed query; reported to the client as 400."""
+
+
+# ---------------------------------------------------------------------------
+# In-memory price index
+# ---------------------------------------------------------------------------
+class PriceIndex:
+    """
+    Column-per-category price matrix over provinces.
+
+    ``prices[keyword][i]`` is the normalized price (per 500g) of that
+    category in ``provinces[i]``; ``wages[i]`` is its hourly wage.
+    """
+
+    def __init__(self, table: PriceTable | None = None):
+        scraped: dict[str, dict[str, float]] = {}
+        if table is not None:
+            for city, view in table.by_city():
+                scraped[CITY_TO_PROVINCE.get(city, city)] = category_medians(view)
+
+        default_basket = sum(DEFAULT_PRICES[k] * w for k, w in BASKET_WEIGHTS.items())
+
+        self.provinces = list(PROVINCE_WAGES)
+        self.wages = array("d", (PROVINCE_WAGES[p] for p in self.provinces))
+        self.prices: dict[str, array] = {k: array("d") for k in BASKET_WEIGHTS}
+        for province in self.provinces:
+            if province in scraped:
+                medians = scraped[province]
+            else:
+                # Split the province estimate in the default category proportions
+                scale = PROVINCE_BASKET_ESTIMATES[province] / default_basket
+                medians = {k: DEFAULT_PRICES[k] * scale for k in BASKET_WEIGHTS}
+            for keyword in BASKET_WEIGHTS:
+                self.prices[keyword].append(medians[keyword])
+
+        self.version = hashlib.sha1(
+            b"".join(col.tobytes() for col in (self.wages, *self.prices.values()))
+        ).hexdigest()[:12]
+
+    def rank(self, weights: dict[str, float], multiplier: float) -> list[dict]:
+        """Basket cost and wage/basket index for every province, best first."""
+        n = len(self.provinces)
+        baskets = [0.0] * n
+        for keyword, weight in weights.items():
+            if weight:
+                col = self.prices[keyword]
+                for i in range(n):
+                    baskets[i] += col[i] * weight
+
+        results = []
+        for i, province in enumerate(self.provinces):
+            wage = self.wages[i] * multiplier
+            basket = baskets[i]
+            results.append({
+                "name": province,
+                "wage": round(wage, 2),
+                "basket_price": round(basket, 2),
+                "index": round(wage / basket, 2) if basket > 0 else None,
+            })
+
+        results.sort(key=lambda x: -1 if x["index"] is None else x["index"], reverse=True)
+        return results
+
+
+# ---------------------------------------------------------------------------
+# Query handling
+# ---------------------------------------------------------------------------
+def parse_query(query: str) -> tuple[tuple[tuple[str, float], ...], float]:
+    """
+    Turn a query string into a canonical, hashable cache key:
+    (sorted (keyword, weight) pairs, multiplier).
+    """
+    weights = dict(BASKET_WEIGHTS)
+    multiplier = 1.0
+
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        keyword = CATEGORY_ALIASES.get(key, key)
+        if key != "multiplier" and keyword not in weights:
+            continue  # cache-busters and other unrelated parameters
+        try:
+            number = float(value)
+        except ValueError:
+            raise QueryError(f"{key}: not a number: {value!r}") from None
+        if not 0 <= number <= MAX_WEIGHT:
+            raise QueryError(f"{key}: must be between 0 and {MAX_WEIGHT:g}")
+
+        if key == "multiplier":
+            multiplier = number
+        else:
+            weights[keyword] = number
+
+    if not any(weights.values()):
+        raise QueryError("basket is empty")
+
+    return tuple(sorted(weights.items())), multiplier
+
+
+class QueryService:
+    """Renders /rank responses from a PriceIndex through an LRU cache."""
+
+    def __init__(self, index: PriceIndex, cache_size: int = CACHE_SIZE):
+        self.index = index
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, tuple[str, bytes, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def reload(self, index: PriceIndex) -> None:
+        """Swap in a rebuilt index and drop responses rendered from the old one."""
+        self.index = index
+        self._cache.clear()
+
+    def render(self, key: tuple) -> tuple[str, bytes, float, bool]:
+        """Return (etag, body, compute_ms, cache_hit) for a canonical query key."""
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return (*cached, True)
+
+        self.misses += 1
+        start = time.perf_counter()
+        weights, multiplier = key
+        ranking = self.index.rank(dict(weights), multiplier)
+        compute_ms = (time.perf_counter() - start) * 1000
+
+        body = json.dumps({
+            "version": self.index.version,
+            "weights": dict(weights),
+            "multiplier": multiplier,
+            "results": ranking,
+        }, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+        self._cache[key] = (etag, body, compute_ms)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return etag, body, compute_ms, False
+
+    def handle(self, method: str, target: str, headers: dict[str, str]) -> tuple[int, dict, bytes]:
+        """Map one request to (status, extra headers, body)."""
+        if method not in ("GET", "HEAD"):
+            return _error(405, "method not allowed")
+
+        url = urlsplit(target)
+        if url.path != "/rank":
+            return _error(404, "not found")
+
+        try:
+            key = parse_query(url.query)
+        except QueryError as e:
+            return _error(400, str(e))
+
+        etag, body, compute_ms, hit = self.render(key)
+        extra = {
+            "ETag": etag,
+            "Cache-Control": "public, max-age=60",
+            "Server-Timing": f'rank;dur={compute_ms:.3f}, cache;desc="{"hit" if hit else "miss"}"',
+        }
+        if _etag_matches(etag, headers.get("if-none-match", "")):
+            return 304, extra, b""
+        return 200, {**extra, "Content-Type": "application/json; charset=utf-8"}, body
+
+
+def _etag_matches(etag: str, header: str) -> bool:
+    """Weak comparison (RFC 9110 §13.1.2): W/ prefixes are ignored, * matches all."""
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _error(status: int, message: str) -> tuple[int, dict, bytes]:
+    body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+    return status, {"Content-Type": "application/json; charset=utf-8"}, body
+
+
+# ---------------------------------------------------------------------------
+# HTTP/1.1 server
+# ---------------------------------------------------------------------------
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+async def serve_connection(service: QueryService, reader, writer) -> None:
+    """
+    Serve keep-alive requests on one connection until the client closes.
+
+    Request bodies are never read. A request that announces one
+    (Content-Length or Transfer-Encoding), uses a method other than
+    GET/HEAD, or has an unparseable request line is answered and the
+    connection closed, so stray body bytes are never parsed as the next
+    request.
+    """
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                break
+
+            lines = head.decode("latin-1").split("\r\n")
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                method, version = "", ""
+                status, extra, body = _error(400, "malformed request line")
+            else:
+                status, extra, body = service.handle(method, target, headers)
+
+            has_body = "transfer-encoding" in headers or headers.get("content-length", "0") != "0"
+            keep_alive = (
+                method in ("GET", "HEAD")
+                and not has_body
+                and headers.get("connection", "").lower() != "close"
+                and version == "HTTP/1.1"
+            )
+            response = [f"HTTP/1.1 {status} {REASONS[status]}"]
+            response += [f"{k}: {v}" for k, v in extra.items()]
+            if status != 304:
+                response.append(f"Content-Length: {len(body)}")
+            response.append("Connection: keep-alive" if keep_alive else "Connection: close")
+            writer.write(("\r\n".join(response) + "\r\n\r\n").encode("latin-1"))
+            if method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def load_index() -> PriceIndex:
+    table = None
+    if RAW_PATH.exists():
+        with open(RAW_PATH, "r", encoding="utf-8") as f:
+            table, _ = filter_outliers(PriceTable.from_rows(json.load(f), normalize_price))
+    return PriceIndex(table)
+
+
+async def start(service: QueryService, host: str, port: int) -> asyncio.Server:
+    server = await asyncio.start_server(
+        lambda r, w: serve_connection(service, r, w), host, port
+    )
+    bound = server.sockets[0].getsockname()
+    index = service.index
+    print(f"🚀 Serving {len(index.provinces)} provinces (index {index.version}) on http://{bound[0]}:{bound[1]}/rank")
+    return server
+
+
+async def run(host: str, port: int) -> None:
+    server = await start(QueryService(load_index()), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Custom basket query service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(run(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Versioned Output Snapshots
+==========================
+Keeps numbered copies of rpp_final.json and field-level delta patches
+between them, so clients holding an older version can catch up without
+re-downloading the whole dataset.
+
+Layout under public/data/:
+    rpp_final.json              latest full dataset (unchanged location)
+    versions/v{N}.json          full snapshot of version N
+    patches/v{N}-v{M}.json      delta taking version N to version M
+    manifest.json               latest version + which patch to fetch
+
+The manifest's "full" entry points at versions/v{latest}.json, never at
+rpp_final.json: that file is overwritten in place by every publish, so a
+client could fetch it after a newer version landed and mislabel it.
+Every file is written to a temporary name and renamed into place, in
+the order version file → patches → rpp_final.json → manifest, and
+pruning runs last, so the manifest never names a file that is missing
+or half-written.
+
+Patch format (provinces keyed by "name"):
+    {
+      "from": 3, "to": 4,
+      "upsert": {"辽宁": {"basket_price": 18.5, "real_index": 0.62}},
+      "remove": ["..."],
+      "order":  ["辽宁", "黑龙江", ...]      # only if the ordering changed
+    }
+
+"upsert" carries only the fields that changed for existing provinces and
+the full record for new ones. For every retained version older than the
+latest, the manifest points at one direct patch to the latest version,
+so a client always applies at most one patch. Consecutive patches
+(v{N}-v{N+1}) inside the retention window are kept as well and listed
+under "chain".
+"""
+
+import json
+import os
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent.parent / "public" / "data"
+KEEP_VERSIONS = 20
+
+
+# ---------------------------------------------------------------------------
+# Diff / patch
+# ---------------------------------------------------------------------------
+_MISSING = object()
+
+
+def diff(old: list[dict], new: list[dict], old_version: int, new_version: int) -> dict:
+    """Field-level delta from ``old`` to ``new``, keyed by province name."""
+    old_by_name = {item["name"]: item for item in old}
+    new_by_name = {item["name"]: item for item in new}
+
+    upsert: dict[str, dict] = {}
+    for name, item in new_by_name.items():
+        before = old_by_name.get(name)
+        if before is None:
+            upsert[name] = item
+            continue
+        changed = {k: v for k, v in item.items() if before.get(k, _MISSING) != v}
+        dropped = [k for k in before if k not in item]
+        if dropped:
+            changed["$unset"] = dropped
+        if changed:
+            upsert[name] = changed
+
+    patch = {"from": old_version, "to": new_version, "upsert": upsert}
+    removed = [name for name in old_by_name if name not in new_by_name]
+    if removed:
+        patch["remove"] = removed
+    new_order = [item["name"] for item in new]
+    if new_order != [item["name"] for item in old if item["name"] in new_by_name]:
+        patch["order"] = new_order
+    return patch
+
+
+def apply_patch(data: list[dict], patch: dict) -> list[dict]:
+    """Apply a patch produced by diff() and return the new dataset."""
+    by_name = {item["name"]: dict(item) for item in data}
+    for name in patch.get("remove", []):
+        by_name.pop(name, None)
+
+    appended = []
+    for name, fields in patch["upsert"].items():
+        if name in by_name:
+            item = by_name[name]
+            for key in fields.get("$unset", []):
+                item.pop(key, None)
+            item.update({k: v for k, v in fields.items() if k != "$unset"})
+        else:
+            by_name[name] = dict(fields)
+            appended.append(name)
+
+    order = patch.get("order")
+    if order is None:
+        order = [item["name"] for item in data if item["name"] in by_name] + appended
+    return [by_name[name] for name in order]
+
+
+# ---------------------------------------------------------------------------
+# Publishing
+# ---------------------------------------------------------------------------
+def _dump(obj, path: Path, indent: int | None = None) -> int:
+    """Atomically write ``obj`` as JSON to ``path``; returns the size in bytes."""
+    data = json.dumps(
+        obj, ensure_ascii=False, indent=indent, separators=None if indent else (",", ":")
+    ).encode("utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def _load(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def publish(data: list[dict], data_dir: Path = DATA_DIR, keep: int = KEEP_VERSIONS) -> int:
+    """
+    Write ``data`` as the latest rpp_final.json and record it as a new
+    version. Returns the published version number; if ``data`` equals the
+    current latest version nothing new is recorded.
+    """
+    versions_dir = data_dir / "versions"
+    patches_dir = data_dir / "patches"
+    versions_dir.mkdir(parents=True, exist_ok=True)
+    patches_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest_path = data_dir / "manifest.json"
+    manifest = _load(manifest_path) if manifest_path.exists() else {"latest": 0, "versions": []}
+    latest = manifest["latest"]
+
+    full_path = data_dir / "rpp_final.json"
+    if not latest and full_path.exists():
+        # Adopt the file already being served as version 1
+        _dump(_load(full_path), versions_dir / "v1.json")
+        latest = 1
+        manifest["versions"] = [1]
+
+    if latest and _load(versions_dir / f"v{latest}.json") == data:
+        _dump(data, full_path, indent=2)
+        manifest["latest"] = latest
+        manifest["full"] = _full_entry(versions_dir, latest)
+        manifest.setdefault("patches", {})
+        manifest.setdefault("chain", [])
+        _dump(manifest, manifest_path, indent=2)
+        print(f"📌 Data unchanged, still at version {latest}")
+        return latest
+
+    version = latest + 1
+    _dump(data, versions_dir / f"v{version}.json")
+    full = _full_entry(versions_dir, version)
+    versions = [v for v in manifest["versions"] if (versions_dir / f"v{v}.json").exists()]
+    versions = (versions + [version])[-keep:]
+
+    # Direct patch from every retained version to the new one; drop any that
+    # would not be smaller than the full snapshot.
+    patches = {}
+    for old in versions[:-1]:
+        patch = diff(_load(versions_dir / f"v{old}.json"), data, old, version)
+        name = f"v{old}-v{version}.json"
+        size = _dump(patch, patches_dir / name)
+        if size < full["bytes"]:
+            patches[str(old)] = {"path": f"patches/{name}", "bytes": size}
+        else:
+            (patches_dir / name).unlink()
+
+    chain = [f"v{a}-v{b}.json" for a, b in zip(versions, versions[1:])]
+    _dump(data, full_path, indent=2)
+    _dump({
+        "latest": version,
+        "versions": versions,
+        "full": full,
+        "patches": patches,
+        "chain": [f"patches/{name}" for name in chain if (patches_dir / name).exists()],
+    }, manifest_path, indent=2)
+
+    # Prune snapshots and patches that fell out of the window, now that the
+    # manifest no longer refers to them
+    for path in versions_dir.glob("v*.json"):
+        if int(path.stem[1:]) not in versions:
+            path.unlink()
+    keep_patches = {Path(p["path"]).name for p in patches.values()} | set(chain)
+    for path in patches_dir.glob("v*-v*.json"):
+        if path.name not in keep_patches:
+            path.unlink()
+
+    print(f"🗂️  Published version {version} ({len(patches)} patch(es) to latest)")
+    return version
+
+
+def _full_entry(versions_dir: Path, version: int) -> dict:
+    path = versions_dir / f"v{version}.json"
+    return {"path": f"{versions_dir.name}/{path.name}", "version": version, "bytes": path.stat().st_size}
+
+
+def resolve(manifest: dict, have: int | None) -> str:
+    """
+    Path (relative to the data dir) a client at version ``have`` should
+    fetch: nothing new (""), one patch, or the full snapshot of the latest
+    version.
+    """
+    if have == manifest["latest"]:
+        return ""
+    patch = manifest["patches"].get(str(have))
+    return patch["path"] if patch else manifest["full"]["path"]